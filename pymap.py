@@ -76,12 +76,19 @@ numbers on this list!
 
 #########################################################################
 '''
+import argparse  # to choose between running, recording, and replaying
+import json  # recorded sessions are stored as JSON lines
 import os
 import sys  # os and sys are imported only to look for the program icon
 import random  # to generate random colors
+import time  # to time attractor renders and replayed actions
 import tkinter as tk  # tkinter powers the GUI
+from types import SimpleNamespace  # stand-ins for frames when replaying
 
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import LogNorm, to_rgba
 from matplotlib.figure import Figure
 import numpy as np
 
@@ -152,6 +159,62 @@ class BasePoint(Polygon):  # pylint: disable=R0903
                 self.name = 'Error: base point did not have two coordinates. '
 
 
+class Scene:
+    '''Holds many polygons, each placed at its own base point, so that
+    they can be transformed and drawn together.  The vertices of every
+    polygon are packed into a single 2xN array, with a column of NaN after
+    each polygon to keep the outlines apart, so a matrix can be applied to
+    the whole scene at once.  The array has spare columns at the end, and
+    is only copied into a bigger one when those run out.
+    '''
+    def __init__(self, capacity=64):
+        self.buffer = np.full((2, capacity), np.nan)
+        self.size = 0
+        self.names = []
+        # starts and stops locate the columns of each polygon in the buffer
+        self.starts = []
+        self.stops = []
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def vertices(self):
+        '''The used part of the buffer, as a view.'''
+        return self.buffer[:, :self.size]
+
+    def add(self, polygon, base_point):
+        '''Appends a polygon translated by a base point to the scene.'''
+        points = polygon.array + base_point.array
+        count = points.shape[1]
+        needed = self.size + count + 1
+        if needed > self.buffer.shape[1]:
+            buffer = np.full((2, max(needed, 2 * self.buffer.shape[1])),
+                             np.nan)
+            buffer[:, :self.size] = self.vertices
+            self.buffer = buffer
+        self.buffer[:, self.size:self.size + count] = points
+        self.buffer[:, self.size + count] = np.nan
+        self.names.append(polygon.name)
+        self.starts.append(self.size)
+        self.stops.append(self.size + count)
+        self.size = needed
+
+    def clear(self):
+        '''Removes every polygon from the scene, keeping the buffer.'''
+        self.size = 0
+        self.names = []
+        self.starts = []
+        self.stops = []
+
+    def shapes(self, array):
+        '''Splits a transformed copy of the vertices into a list of Nx2
+        views, one for each polygon, as matplotlib collections expect.
+        '''
+        return [array[:, start:stop].T
+                for start, stop in zip(self.starts, self.stops)]
+
+
 class AppData:
     '''Gathers all of the backend calculations into a single object.
     Automatically performs calculations for the first polygon and the first
@@ -161,6 +224,7 @@ class AppData:
         if base_point is None:
             base_point = BasePoint(0, 0)
         self.base_point = base_point
+        self.scene = Scene()
         self.polygon_dict = _read_polygons_to_dict()
         try:
             polygon_name = self.list_polygons()[0]
@@ -187,12 +251,14 @@ class AppData:
         self.before = self.polygon.array + self.base_point.array
 
     def make_transformed_polygon(self):
-        '''Create the transformed polygon array for plotting.'''
+        '''Create the transformed polygon and scene arrays for plotting.'''
         self.after = self.matrix.array @ self.before
+        self.scene_after = self.matrix.array @ self.scene.vertices
 
     def make_transformed_polygon_again(self):
-        '''Transform the polygon again with the same matrix.'''
+        '''Transform the polygon and scene again with the same matrix.'''
         self.after = self.matrix.array @ self.after
+        self.scene_after = self.matrix.array @ self.scene_after
 
     def add_matrix_to_dict(self, matrix):
         '''Add a matrix to the matrix dictionary.'''
@@ -211,6 +277,323 @@ class AppData:
         return list(self.matrix_dict.keys())
 
 
+class HitIndex:
+    '''Answers "what is under the cursor?" for a list of plotted layers.
+    Each layer is a 2xN vertex array like AppData.before, and may contain NaN
+    columns to separate several outlines.  The vertices of every layer are
+    bucketed into a uniform grid once, when the index is built, so that
+    finding the nearest vertex only looks at the handful of cells around the
+    cursor.  Point-in-polygon tests use the even-odd rule on every edge of
+    the layers whose bounding boxes contain the cursor, all at once in numpy.
+    Each outline is tested on its own, so outlines in the same layer that
+    overlap do not cancel each other out.  Build a new index whenever the
+    layers change; queries are read-only.
+    '''
+    # average number of vertices per grid cell
+    vertices_per_cell = 4
+
+    def __init__(self, layers):
+        sizes = np.array([layer.shape[1] for layer in layers], dtype=np.intp)
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))
+        if sizes.sum() == 0:
+            points = np.zeros((2, 0))
+        else:
+            points = np.concatenate(layers, axis=1).astype(np.float64)
+        count = points.shape[1]
+        layer_of = np.repeat(np.arange(len(layers)), sizes)
+        vertex_of = np.arange(count) - self.offsets[layer_of]
+        finite = np.isfinite(points).all(axis=0)
+        self._make_edges(points, finite, layer_of)
+        self._make_boxes(points, finite, sizes)
+        self._make_grid(points[:, finite], layer_of[finite],
+                        vertex_of[finite])
+
+    def _make_edges(self, points, finite, layer_of):
+        '''Pair each finite vertex with the next one in its outline.  The
+        last vertex of a run of finite vertices is paired with the first one,
+        which closes the outline the same way matplotlib's fill() does.
+        '''
+        count = points.shape[1]
+        index = np.arange(count)
+        previous_ok = np.zeros(count, dtype=bool)
+        previous_ok[1:] = finite[:-1] & (layer_of[1:] == layer_of[:-1])
+        run_start = finite & ~previous_ok
+        next_ok = np.zeros(count, dtype=bool)
+        next_ok[:-1] = previous_ok[1:] & finite[1:]
+        run_starts = index[run_start]
+        if run_starts.size == 0:
+            run_starts = np.zeros(1, dtype=np.intp)
+        run_of = np.cumsum(run_start) - 1
+        first_of_run = run_starts[np.maximum(run_of, 0)]
+        following = np.where(next_ok, index + 1, first_of_run)[finite]
+        self.edge_start = points[:, finite]
+        self.edge_end = points[:, following]
+        self.edge_layer = layer_of[finite]
+        self.edge_run = run_of[finite]
+        # edges of each layer are contiguous, so record where they begin
+        self.edge_offsets = np.searchsorted(
+            self.edge_layer, np.arange(len(self.offsets))
+            )
+        # run_layer is the layer of each run, and run_first the column of
+        # that layer where the run begins
+        self.run_layer = layer_of[run_start]
+        self.run_first = index[run_start] - self.offsets[self.run_layer]
+
+    def _make_boxes(self, points, finite, sizes):
+        '''Find the bounding box of every layer, ignoring NaN columns.'''
+        lower = np.where(finite, points, np.inf)
+        upper = np.where(finite, points, -np.inf)
+        self.box_lower = np.full((2, len(sizes)), np.inf)
+        self.box_upper = np.full((2, len(sizes)), -np.inf)
+        filled = sizes > 0
+        if filled.any():
+            starts = self.offsets[:-1][filled]
+            self.box_lower[:, filled] = np.minimum.reduceat(
+                lower, starts, axis=1)
+            self.box_upper[:, filled] = np.maximum.reduceat(
+                upper, starts, axis=1)
+
+    def _make_grid(self, points, layer_of, vertex_of):
+        '''Sort the finite vertices by grid cell, row by row, so that any
+        horizontal run of cells is a single slice of the sorted arrays.
+        '''
+        count = points.shape[1]
+        if count == 0:
+            self.grid_lower = np.zeros(2)
+            self.cell_size = np.ones(2)
+            self.shape = (1, 1)
+        else:
+            self.grid_lower = points.min(axis=1)
+            extent = points.max(axis=1) - self.grid_lower
+            cells = max(1, int(np.sqrt(count / self.vertices_per_cell)))
+            self.cell_size = np.where(extent > 0, extent / cells, 1.0)
+            self.shape = (cells, cells)
+        cell = self._cells_of(points)
+        key = cell[1] * self.shape[0] + cell[0]
+        order = np.argsort(key)
+        self.points = points[:, order]
+        self.layer_of = layer_of[order]
+        self.vertex_of = vertex_of[order]
+        self.cell_starts = np.searchsorted(
+            key[order], np.arange(self.shape[0] * self.shape[1] + 1)
+            )
+
+    def _cells_of(self, points):
+        '''Grid cell (column, row) of each point, clipped to the grid.'''
+        cell = np.floor((points - self.grid_lower.reshape(2, 1)) /
+                        self.cell_size.reshape(2, 1))
+        limit = np.array(self.shape).reshape(2, 1) - 1
+        return np.clip(cell, 0, limit).astype(np.intp)
+
+    def nearest_vertex(self, x, y, radius):
+        '''Returns (layer, vertex) for the closest vertex no further than
+        radius from (x, y), or None.  Ties go to the layer drawn last.
+        '''
+        if self.points.shape[1] == 0:
+            return None
+        corners = np.array([[x - radius, x + radius],
+                            [y - radius, y + radius]])
+        grid_upper = self.grid_lower + self.cell_size * np.array(self.shape)
+        if (corners[:, 1] < self.grid_lower).any() or \
+                (corners[:, 0] > grid_upper).any():
+            return None
+        (col_0, col_1), (row_0, row_1) = self._cells_of(corners)
+        width = self.shape[0]
+        slices = [np.arange(self.cell_starts[row * width + col_0],
+                            self.cell_starts[row * width + col_1 + 1])
+                  for row in range(row_0, row_1 + 1)]
+        nearby = np.concatenate(slices)
+        if nearby.size == 0:
+            return None
+        offset = self.points[:, nearby] - np.array([[x], [y]])
+        dist = np.hypot(offset[0], offset[1])
+        close = dist <= radius
+        if not close.any():
+            return None
+        nearby, dist = nearby[close], dist[close]
+        best = nearby[np.lexsort((-self.layer_of[nearby], dist))[0]]
+        return int(self.layer_of[best]), int(self.vertex_of[best])
+
+    def containing_layers(self, x, y):
+        '''Returns the indices of the layers with an outline containing
+        (x, y), in drawing order.
+        '''
+        return np.unique(self.run_layer[self.containing_runs(x, y)])
+
+    def containing_runs(self, x, y):
+        '''Returns the indices of the outlines, counted across all layers,
+        that contain (x, y), in drawing order.
+        '''
+        candidates = np.flatnonzero(
+            (self.box_lower[0] <= x) & (x <= self.box_upper[0]) &
+            (self.box_lower[1] <= y) & (y <= self.box_upper[1])
+            )
+        if candidates.size == 0:
+            return candidates
+        edges = np.concatenate([
+            np.arange(self.edge_offsets[layer],
+                      self.edge_offsets[layer + 1])
+            for layer in candidates
+            ])
+        (x_0, y_0) = self.edge_start[:, edges]
+        (x_1, y_1) = self.edge_end[:, edges]
+        crosses = (y_0 > y) != (y_1 > y)
+        edges, x_0, y_0, x_1, y_1 = (
+            edges[crosses], x_0[crosses], y_0[crosses], x_1[crosses],
+            y_1[crosses]
+            )
+        x_cross = x_0 + (y - y_0) * (x_1 - x_0) / (y_1 - y_0)
+        hits = np.bincount(self.edge_run[edges][x < x_cross],
+                           minlength=self.run_layer.size)
+        return np.flatnonzero(hits % 2 == 1)
+
+    def pick(self, x, y, radius):
+        '''Returns (layer, vertex, column) for the thing under (x, y), where
+        column is a column of the layer on the outline that was hit.
+        Vertices within radius win, and are also the column; otherwise the
+        topmost outline containing the point is returned with vertex None and
+        its first column.  Returns None if nothing was hit.
+        '''
+        hit = self.nearest_vertex(x, y, radius)
+        if hit is not None:
+            return hit + (hit[1], )
+        inside = self.containing_runs(x, y)
+        if inside.size == 0:
+            return None
+        run = inside[-1]
+        return int(self.run_layer[run]), None, int(self.run_first[run])
+
+
+class Attractor:
+    '''An iterated function system built from matrices in the catalog.
+    Each map sends a point p to matrix @ p + translation and is picked at
+    random with its own probability.  Iterating many points this way (the
+    "chaos game") fills in the attractor of the system, which density()
+    accumulates into a 2D histogram.  Rather than following one point at a
+    time, a batch of independent walkers takes each step together, and the
+    histogram is updated one chunk of steps at a time so that memory use
+    does not grow with the number of points requested.
+    '''
+    def __init__(self, matrices, translations, probabilities):
+        self.maps = np.array([matrix.array for matrix in matrices],
+                             dtype=np.float64).reshape(-1, 2, 2)
+        self.translations = np.array(translations,
+                                     dtype=np.float64).reshape(-1, 2)
+        weights = np.array(probabilities, dtype=np.float64)
+        if weights.sum() <= 0:
+            weights = np.ones(len(self.maps))
+        self.probabilities = weights / weights.sum()
+
+    def _steps(self, rng, x, y, count):  # pylint: disable=C0103
+        '''Moves the walkers at (x, y) count times, yielding the new
+        positions after each step.
+        '''
+        cumulative = np.cumsum(self.probabilities)
+        cumulative[-1] = 1.0
+        (a, b), (c, d) = self.maps.transpose(1, 2, 0)
+        (e, f) = self.translations.T
+        for _ in range(count):
+            k = np.searchsorted(cumulative, rng.random(x.size), side='right')
+            (x, y) = (a[k] * x + b[k] * y + e[k], c[k] * x + d[k] * y + f[k])
+            yield x, y
+
+    def density(self, count, **kwargs):
+        '''Returns (histogram, extent) for count points of the attractor.
+        histogram is a bins x bins array of hit counts, laid out for imshow
+        with origin='lower', and extent is (left, right, bottom, top).  The
+        keyword arguments are those of density_chunks().
+        '''
+        for (histogram, extent, _) in self.density_chunks(count, **kwargs):
+            pass
+        return histogram, extent
+
+    def density_chunks(self, count, bins=512,  # pylint: disable=R0913
+                       extent=None, walkers=2 ** 16, chunk_size=2 ** 22,
+                       burn_in=40, seed=None):
+        '''Works like density(), but yields (histogram, extent, done) after
+        each chunk of about chunk_size points, where done is the number of
+        points counted so far, so that a caller can show progress or stop
+        early.  The same histogram array is updated in place each time.  If
+        no extent is given, one is estimated from the walkers after they have
+        taken burn_in steps.  Points that land outside of the extent, or that
+        escape to infinity, are dropped.
+        '''
+        rng = np.random.default_rng(seed)
+        count = max(0, count)
+        walkers = max(1, min(walkers, count))
+        steps_per_chunk = max(1, chunk_size // walkers)
+        histogram = np.zeros(bins * bins + 1, dtype=np.int64)
+        with np.errstate(over='ignore', invalid='ignore'):
+            (x, y) = rng.uniform(-1, 1, (2, walkers))
+            for (x, y) in self._steps(rng, x, y, burn_in):
+                pass
+            if extent is None:
+                extent = _padded_extent(x, y)
+        extent = tuple(float(value) for value in extent)
+        (left, right, bottom, top) = extent
+        x_scale = bins / (right - left)
+        y_scale = bins / (top - bottom)
+        flat = np.empty((steps_per_chunk, walkers), dtype=np.intp)
+        remaining = count
+        while True:
+            steps = min(steps_per_chunk, -(-remaining // walkers))
+            with np.errstate(over='ignore', invalid='ignore'):
+                for row, (x, y) in enumerate(self._steps(rng, x, y, steps)):
+                    column = (x - left) * x_scale
+                    line = (y - bottom) * y_scale
+                    inside = (column >= 0) & (column < bins) & \
+                        (line >= 0) & (line < bins)
+                    flat[row] = np.where(
+                        inside, line.astype(np.intp) * bins +
+                        column.astype(np.intp), bins * bins
+                        )
+            used = flat[:steps].ravel()[:remaining]
+            histogram += np.bincount(used, minlength=bins * bins + 1)
+            remaining -= used.size
+            yield (histogram[:-1].reshape(bins, bins), extent,
+                   count - remaining)
+            if remaining <= 0:
+                return
+
+
+def _padded_extent(x, y, padding=0.05):  # pylint: disable=C0103
+    '''A square (left, right, bottom, top) around the finite points, with
+    some room to spare.  Falls back to the unit square if there are none.
+    '''
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.any():
+        return (-1.0, 1.0, -1.0, 1.0)
+    (x, y) = (x[finite], y[finite])
+    center = np.array([x.max() + x.min(), y.max() + y.min()]) / 2
+    half = max(x.max() - x.min(), y.max() - y.min(), 1e-9) * \
+        (0.5 + padding)
+    return (center[0] - half, center[0] + half,
+            center[1] - half, center[1] + half)
+
+
+class Recorder:
+    '''Writes user actions to a file so that the session can be replayed
+    later by replay_session().  Each line of the file is a JSON object with
+    the action name, its arguments, and the time in seconds since recording
+    started.  Lines are flushed as they are written so that a session that
+    ends in a crash is still recorded up to the crash.
+    '''
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.start = time.perf_counter()
+
+    def log(self, action, *args):
+        '''Writes one action to the file.'''
+        line = {"time": round(time.perf_counter() - self.start, 4),
+                "action": action, "args": list(args)}
+        self.file.write(json.dumps(line) + "\n")
+        self.file.flush()
+
+    def close(self):
+        '''Stops recording.'''
+        self.file.close()
+
+
 def _read_matrices_to_dict():
     '''Get the list of matrices from the matrices.ini file.'''
     try:
@@ -362,6 +745,13 @@ class PyMapApp(tk.Tk):
     font_size = [8, 10, 12]
     # sets the default initial translation for a polygon
     default_base_point = BasePoint(1, 0)
+    # how close, in pixels, a click must be to a vertex to select it
+    pick_radius = 6
+    # how long, in milliseconds, typing in an entry field is collected
+    # before the plot is redrawn; 16 ms is about one frame at 60 Hz
+    live_update_delay = 16
+    # when set to a Recorder, user actions are written to its file
+    recorder = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -386,22 +776,98 @@ class PyMapApp(tk.Tk):
             self.container, side="left", fill="both", expand=True
             )
 
+    def record(self, action, *args):
+        '''Passes a user action on to the recorder, if there is one.'''
+        if self.recorder is not None:
+            self.recorder.log(action, *args)
+
 
-class ControlFrame(SimpleFrame):
-    '''Frame to house user controls.  Its methods govern the tkinter app
-    behavior.
+class ControlMethods:
+    '''The methods that govern the tkinter app behavior, kept apart from
+    the widgets in ControlFrame so that they can also be driven without a
+    display by HeadlessApp.  Classes using it must provide the same frame
+    and variable attributes that ControlFrame does.
     '''
-    def __init__(self, parent, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        self.root = parent.root
-        pack_kwargs = {"side": "top", "fill": "both", "expand": True}
-        spacer(self, 40, 1, "top")
-        self.polygon_frame = PolygonFrame(self, **pack_kwargs)
-        spacer(self, 10, 1, "top")
-        self.base_point_frame = BasePointFrame(self, **pack_kwargs)
-        spacer(self, 30, 1, "top")
-        self.matrix_frame = MatrixFrame(self, **pack_kwargs)
-        spacer(self, 40, 1, "top")
+    def watch_entries(self):
+        '''Typing in any numeric entry schedules a live update.  The pending
+        field remembers the scheduled update so that a burst of keystrokes
+        only redraws once, and quiet is set while the app writes to the
+        entries itself.  entry_names locates each variable for recording.
+        '''
+        self.pending = None
+        self.quiet = False
+        self.entry_names = dict()
+        entries = [self.base_point_frame.entry] + self.matrix_frame.row
+        for field, entry in enumerate(entries):
+            for index, var in enumerate(entry.ent):
+                self.entry_names[str(var)] = (field, index)
+                var.trace_add("write", self.entry_changed)
+
+    def entry_variable(self, field, index):
+        '''Returns a numeric entry variable by its place in entry_names.'''
+        entries = [self.base_point_frame.entry] + self.matrix_frame.row
+        return entries[field].ent[index]
+
+    def entry_changed(self, name, *_):
+        '''Schedules a live update when the user edits a numeric entry,
+        unless one is already waiting.
+        '''
+        if self.quiet:
+            return
+        self.root.record("entry", *self.entry_names[name],
+                         str(self.root.getvar(name)))
+        if self.pending is not None:
+            return
+        self.pending = self.after(
+            self.root.live_update_delay, self.live_update
+            )
+
+    def flush_live_update(self):
+        '''Runs a scheduled live update right away.'''
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+            self.live_update()
+
+    def live_update(self):
+        '''Transforms and redraws the polygon using the numbers currently in
+        the entry fields.  Unlike update_app_data(), partial input such as
+        "-" or "1e" is not replaced by defaults: the update is skipped and
+        the plot is left alone until the entries make sense again.
+        '''
+        self.pending = None
+        base_entry = self.base_point_frame.entry
+        row = self.matrix_frame.row
+        try:
+            base_point = BasePoint(base_entry.ent[0].get(),
+                                   base_entry.ent[1].get())
+            x_list = [row[0].ent[0].get(), row[0].ent[1].get()]
+            y_list = [row[1].ent[0].get(), row[1].ent[1].get()]
+        except tk.TclError:
+            return
+        name = self.matrix_frame.save_frame.matrix_name.get()
+        self.root.data.base_point = base_point
+        self.root.data.matrix = Matrix(name, x_list, y_list)
+        self.root.data.make_plot_polygon()
+        self.root.data.make_transformed_polygon()
+        self.root.plot_frame.replot()
+
+    def set_entries(self, values):
+        '''Writes values to the UI without triggering live updates.  values
+        is a list of (tkinter variable, new value) pairs; tkinter variables
+        cannot be used as dictionary keys.
+        '''
+        self.quiet = True
+        try:
+            for var, value in values:
+                var.set(value)
+        finally:
+            self.quiet = False
+
+    def set_base_point(self, x, y):  # pylint: disable=C0103
+        '''Puts (x, y) in the base point entries and updates the app.'''
+        entry = self.base_point_frame.entry
+        self.set_entries([(entry.ent[0], x), (entry.ent[1], y)])
+        self.update_app_data()
 
     def refresh_entries(self):
         '''This takes the data from root.data and propagates it to the UI.
@@ -412,13 +878,14 @@ class ControlFrame(SimpleFrame):
         array = self.root.data.matrix.array
         row = self.matrix_frame.row
         name = self.root.data.matrix.name
-        self.matrix_frame.save_frame.matrix_name.set(name)
+        values = [(self.matrix_frame.save_frame.matrix_name, name)]
         for row_index in range(2):
-            base_entry.ent[row_index].set(float(base_point.item(row_index, 0)))
+            values.append((base_entry.ent[row_index],
+                           float(base_point.item(row_index, 0))))
             for col_index in range(2):
-                row[row_index].ent[col_index].set(
-                    array.item(row_index, col_index)
-                    )
+                values.append((row[row_index].ent[col_index],
+                               array.item(row_index, col_index)))
+        self.set_entries(values)
         self.root.data.make_plot_polygon()
         self.root.data.make_transformed_polygon()
         self.root.plot_frame.replot()
@@ -453,24 +920,51 @@ class ControlFrame(SimpleFrame):
             except tk.TclError:
                 y_list[row_index] = 1
                 name = name + ' Error: a matrix entry was non-numeric. '
-        matrix = Matrix(name, x_list, y_list)
-        # Save the matrix to the dictionary if an unused name is given, then
-        # reload the dropdown menu to allow the matrix to be used again.
-        matrix_list = self.root.data.list_matrices()
-        if name not in matrix_list:
+        self.root.data.matrix = Matrix(name, x_list, y_list)
+        self.refresh_entries()
+
+    def save_matrix(self):
+        '''Updates the app from the UI, then saves the matrix to the
+        dictionary if an unused name is given and reloads the dropdown menu to
+        allow the matrix to be used again.
+        '''
+        self.root.record(
+            "save_matrix", self.matrix_frame.save_frame.matrix_name.get()
+            )
+        self.update_app_data()
+        mat = self.matrix_frame
+        matrix = self.root.data.matrix
+        if matrix.name not in self.root.data.list_matrices():
             self.root.data.add_matrix_to_dict(matrix)
-            mat.choices = matrix_list
-            mat.choice.set(name)
+            mat.choices = self.root.data.list_matrices()
+            mat.choice.set(matrix.name)
             mat.menu_frame.reload(
                 mat.choice, *mat.choices, command=mat.change_matrix
                 )
-        self.root.data.matrix = matrix
-        self.refresh_entries()
+
+    def add_to_scene(self):
+        '''Leaves a copy of the polygon at its current base point in the
+        scene, where it is transformed along with the polygon.
+        '''
+        self.root.record("add_to_scene")
+        self.root.data.scene.add(
+            self.root.data.polygon, self.root.data.base_point
+            )
+        self.root.data.make_transformed_polygon()
+        self.root.plot_frame.replot()
+
+    def clear_scene(self):
+        '''Removes every polygon from the scene.'''
+        self.root.record("clear_scene")
+        self.root.data.scene.clear()
+        self.root.data.make_transformed_polygon()
+        self.root.plot_frame.replot()
 
     def change_polygon(self, choice):
         '''Changes the polygon in root.data when a new selection on the
         pulldown is made.  It then updates the rest of the UI.
         '''
+        self.root.record("change_polygon", choice)
         self.root.data.polygon = self.root.data.polygon_dict[choice]
         try:
             entry = self.base_point_frame.entry
@@ -486,6 +980,7 @@ class ControlFrame(SimpleFrame):
         '''Changes the matrix in root.data when a new selection on the
         pulldown is made.  It then updates the rest of the UI.
         '''
+        self.root.record("change_matrix", choice)
         self.root.data.matrix = self.root.data.matrix_dict[choice]
         try:
             entry = self.base_point_frame.entry
@@ -498,6 +993,36 @@ class ControlFrame(SimpleFrame):
         self.refresh_entries()
 
 
+class ControlFrame(ControlMethods, SimpleFrame):
+    '''Frame to house user controls.  Its methods, mostly inherited from
+    ControlMethods, govern the tkinter app behavior.
+    '''
+    def __init__(self, parent, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.root = parent.root
+        pack_kwargs = {"side": "top", "fill": "both", "expand": True}
+        spacer(self, 40, 1, "top")
+        self.polygon_frame = PolygonFrame(self, **pack_kwargs)
+        spacer(self, 10, 1, "top")
+        self.base_point_frame = BasePointFrame(self, **pack_kwargs)
+        spacer(self, 30, 1, "top")
+        self.matrix_frame = MatrixFrame(self, **pack_kwargs)
+        spacer(self, 30, 1, "top")
+        self.selection_frame = SelectionFrame(self, **pack_kwargs)
+        spacer(self, 30, 1, "top")
+        self.attractor_button = tk.Button(
+            self, text="Attractor", command=self.open_attractor, height=1,
+            font=(self.root.font_name, self.root.font_size[0])
+            )
+        self.attractor_button.pack(side="top", fill="none", expand=True)
+        spacer(self, 40, 1, "top")
+        self.watch_entries()
+
+    def open_attractor(self):
+        '''Opens a window for rendering attractors of the matrix catalog.'''
+        AttractorWindow(self.root)
+
+
 class PolygonFrame(SimpleFrame):
     '''A frame to hold polygon-related widgets.'''
     def __init__(self, parent, *args, **kwargs):
@@ -514,11 +1039,34 @@ class PolygonFrame(SimpleFrame):
         self.menu_frame = MenuFrame(
             self, self.choice, *self.choices, command=self.change_polygon
             )
+        self.container = SimpleFrame(
+            self, side="top", fill="both", expand=True)
+        pack_kwargs = {"side": "left", "fill": "none", "expand": True}
+        self.add_button = tk.Button(
+            self.container, text="Add to scene",
+            command=self.add_to_scene, height=1,
+            font=(self.root.font_name, self.root.font_size[0])
+            )
+        self.add_button.pack(**pack_kwargs)
+        self.clear_button = tk.Button(
+            self.container, text="Clear scene",
+            command=self.clear_scene, height=1,
+            font=(self.root.font_name, self.root.font_size[0])
+            )
+        self.clear_button.pack(**pack_kwargs)
 
     def change_polygon(self, choice):
         '''Currently just an alias for the change_polygon() method.'''
         self.root.control_frame.change_polygon(choice)
 
+    def add_to_scene(self):
+        '''Currently just an alias for the add_to_scene() method.'''
+        self.root.control_frame.add_to_scene()
+
+    def clear_scene(self):
+        '''Currently just an alias for the clear_scene() method.'''
+        self.root.control_frame.clear_scene()
+
 
 class MenuFrame(tk.Frame):
     '''Constructs a frame with a dropdown menu and a method to reload it.
@@ -642,22 +1190,60 @@ class SaveFrame(SimpleFrame):
         pack_kwargs = {"side": "left", "fill": "none", "expand": True}
         self.name_entry.pack(**pack_kwargs)
         self.save_button = tk.Button(
-            self.container, text="Refresh",
+            self.container, text="Save",
             command=self.save_matrix, height=1,
             font=(self.root.font_name, self.root.font_size[0])
             )
         self.save_button.pack(**pack_kwargs)
 
     def save_matrix(self):
-        '''Currently just an alias for the update_app_data() method.'''
-        self.root.control_frame.update_app_data()
+        '''Currently just an alias for the save_matrix() method.'''
+        self.root.control_frame.save_matrix()
 
 
-class PlotFrame(SimpleFrame):  # pylint: disable=R0902
-    '''Frame to hold a canvas with matplotlib plots.'''
+class SelectionFrame(SimpleFrame):
+    '''A frame to show what was last clicked on in the plot.'''
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         self.root = parent.root
+        self.label = tk.Label(
+            self, text="Selection",
+            font=(self.root.font_name, self.root.font_size[2])
+            )
+        self.label.pack(side="top")
+        self.text = tk.StringVar(self, "nothing selected")
+        self.info = tk.Label(
+            self, textvariable=self.text, justify="center",
+            font=(self.root.font_name, self.root.font_size[0])
+            )
+        self.info.pack(side="top")
+
+    def show(self, iterate, vertex, x, y, shape=None):  # pylint: disable=C0103
+        '''Displays the iterate number of the selected layer, along with the
+        selected vertex or the clicked point if the layer was hit inside.
+        Vertices of the scene also show which of its polygons they are on.
+        '''
+        if iterate is None:
+            self.text.set("nothing selected")
+            return
+        if vertex is None:
+            where = "inside"
+        else:
+            where = "vertex " + str(vertex)
+        if shape is not None:
+            where = "shape {}, {}".format(shape, where)
+        self.text.set("iterate {}, {}\n({:.4g}, {:.4g})".format(
+            iterate, where, x, y
+            ))
+
+
+class PlotMethods:  # pylint: disable=R0902
+    '''The plotting methods of PlotFrame, kept apart from its tkinter
+    canvas so that HeadlessApp can draw on an offscreen canvas instead.
+    Classes using it must call make_figure() and then provide a canvas.
+    '''
+    def make_figure(self):
+        '''Creates the matplotlib figure and the plot bookkeeping.'''
         self.plot_figure = Figure(figsize=(5, 5), dpi=100)
         self.plot_axis = self.plot_figure.add_subplot(111)
         self.plot_axis.set_axisbelow(True)
@@ -666,12 +1252,17 @@ class PlotFrame(SimpleFrame):  # pylint: disable=R0902
         self.plot_after = self.plot_axis.plot([0], [0])
         self.fill_before = self.plot_axis.fill([0], [0])
         self.fill_after = self.plot_axis.fill([0], [0])
-        self.canvas = FigureCanvasTkAgg(self.plot_figure, self)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(
-            side="top", fill="both", expand=True,
-            )
-        self.canvas.mpl_connect('button_press_event', self.onclick)
+        # layers holds the vertex arrays of everything plotted, and
+        # layer_info the iterate number of each one along with whether it
+        # belongs to the scene.  hit_index is rebuilt from the layers only
+        # after they change.
+        self.layers = []
+        self.layer_info = []
+        self.hit_index = None
+        self.marker = None
+        # the figure size last written to the recorder; clicks are turned
+        # into data coordinates and pick radii using it
+        self.recorded_size = None
 
     def replot(self):
         '''Erases old plots and creates a new plot based on the contents
@@ -682,11 +1273,20 @@ class PlotFrame(SimpleFrame):  # pylint: disable=R0902
         y = [data.before[1, ], data.after[1, ]]  # pylint: disable=C0103
         ax_lim = 3.5
         if self.root.rescale_axes is True:
-            entry_list = np.concatenate([x[0], x[1], y[0], y[1]]).tolist()
-            max_entry = max(map(abs, entry_list))
+            entry_list = np.concatenate([
+                x[0], x[1], y[0], y[1], data.scene.vertices.ravel(),
+                data.scene_after.ravel()
+                ])
+            max_entry = np.nanmax(np.abs(entry_list))
             ax_lim = max([max_entry * 1.2, 3.5])
         ax = self.plot_axis  # pylint: disable=C0103
         ax.clear()
+        self.layers = [data.before, data.after,
+                       data.scene.vertices, data.scene_after]
+        self.layer_info = [(0, False), (1, False), (0, True), (1, True)]
+        self.hit_index = None
+        self.marker = None
+        self.root.control_frame.selection_frame.show(None, None, 0, 0)
         color = self.root.plot_color
         ax.axhline(y=0, color=color[2])
         ax.axvline(x=0, color=color[2])
@@ -695,6 +1295,8 @@ class PlotFrame(SimpleFrame):  # pylint: disable=R0902
         self.plot_after = ax.plot(x[1], y[1], color=color[1], linewidth=2.5)
         self.fill_before = ax.fill(x[0], y[0], facecolor=color[0], alpha=.5)
         self.fill_after = ax.fill(x[1], y[1], facecolor=color[1], alpha=.5)
+        self.add_scene(data.scene.vertices, color[0])
+        self.add_scene(data.scene_after, color[1])
         (before, ) = self.plot_before
         (after, ) = self.plot_after
         ax.legend(
@@ -720,32 +1322,468 @@ class PlotFrame(SimpleFrame):  # pylint: disable=R0902
         y = data.after[1, ]  # pylint: disable=C0103
         ax.plot(x, y, color=color, linewidth=2.5)
         ax.fill(x, y, facecolor=color, alpha=.5)
+        self.add_scene(data.scene_after, color)
+        iterate = self.layer_info[-1][0] + 1
+        self.layers += [data.after, data.scene_after]
+        self.layer_info += [(iterate, False), (iterate, True)]
+        self.hit_index = None
+
+    def add_scene(self, array, color):
+        '''Draws every polygon of the scene, as given by the vertex array,
+        using a single matplotlib collection.
+        '''
+        scene = self.root.data.scene
+        if len(scene) == 0:
+            return
+        self.plot_axis.add_collection(PolyCollection(
+            scene.shapes(array), facecolors=to_rgba(color, .5),
+            edgecolors=color, linewidths=2.5
+            ))
+
+    def pick(self, x, y):  # pylint: disable=C0103
+        '''Hit-tests the point (x, y) against every plotted layer.  Returns
+        (layer, vertex, column) as described in HitIndex.pick(), or None.
+        '''
+        if self.hit_index is None:
+            self.hit_index = HitIndex(self.layers)
+        return self.hit_index.pick(x, y, self.data_radius())
+
+    def data_radius(self):
+        '''Returns the app's pick radius converted from pixels to data units
+        for the plot as it is currently drawn.
+        '''
+        ax = self.plot_axis  # pylint: disable=C0103
+        pixels = ax.transData.inverted().transform(
+            [(0, 0), (self.root.pick_radius, 0)]
+            )
+        return abs(pixels[1, 0] - pixels[0, 0])
+
+    def select(self, layer, vertex, column, x, y):  # pylint: disable=C0103
+        '''Shows the selected layer in the UI and marks it on the plot.
+        Selections in the scene show which of its polygons the picked column
+        belongs to, and vertices of the scene are numbered within their own
+        polygon.
+        '''
+        (iterate, in_scene) = self.layer_info[layer]
+        shape = None
+        if in_scene:
+            starts = self.root.data.scene.starts
+            shape = int(np.searchsorted(starts, column, 'right')) - 1
+        if vertex is not None:
+            (x, y) = self.layers[layer][:, vertex]
+            if in_scene:
+                vertex = vertex - starts[shape]
+        if self.marker is not None:
+            self.marker.remove()
+        (self.marker, ) = self.plot_axis.plot(
+            [x], [y], marker='o', markersize=8, fillstyle='none',
+            color=self.root.plot_color[2]
+            )
+        self.root.control_frame.selection_frame.show(
+            iterate, vertex, x, y, shape=shape
+            )
+        self.canvas.draw_idle()
+
+    def record_canvas(self):
+        '''Records the figure size in inches and its dpi whenever they have
+        changed since they were last recorded, so that a replay can match
+        them.
+        '''
+        if self.root.recorder is None:
+            return
+        size = self.plot_figure.get_size_inches().tolist() + \
+            [float(self.plot_figure.dpi)]
+        if size != self.recorded_size:
+            self.recorded_size = size
+            self.root.record("canvas", *size)
+
+    def resize(self, width, height, dpi):
+        '''Sets the figure to the size and dpi given by record_canvas().'''
+        self.plot_figure.set_dpi(dpi)
+        self.plot_figure.set_size_inches(width, height)
+        self.canvas.draw()
+
+    def onresize(self, event):  # pylint: disable=W0613
+        '''Records the new canvas size whenever the plot window is resized.'''
+        self.record_canvas()
 
     def onclick(self, event):
-        '''Places coordinate information in the UI when the user clicks on
-        the plot and then updates the app using the coordinates as a base
+        '''Left clicking on a vertex or inside a plotted polygon selects it
+        and shows its iterate number in the UI.  Any other click on the plot
+        (or a right click anywhere on it) places coordinate information in
+        the UI and then updates the app using the coordinates as a base
         point for the polygon.  Clicking off of the axes in the plot window
         adds an extra plot with a random color.'''
-        entry = app.control_frame.base_point_frame.entry
+        self.root.record("click", event.xdata, event.ydata, int(event.button))
         if event.xdata is not None and event.ydata is not None:
-            entry.ent[0].set(event.xdata)
-            entry.ent[1].set(event.ydata)
-            self.root.control_frame.update_app_data()
+            hit = None
+            if event.button != 3:
+                hit = self.pick(event.xdata, event.ydata)
+            if hit is not None:
+                self.select(*hit, event.xdata, event.ydata)
+                return
+            self.root.control_frame.set_base_point(event.xdata, event.ydata)
         else:
             self.add_plot()
             self.canvas.draw()
 
 
-app = PyMapApp()  # pylint: disable=C0103
-app.control_frame.refresh_entries()
-# This detects if the program is running from a file instead of an
-# interpreter and loads the app icon appropriately.  If it can't load an icon,
-# the exception is ignored and the program runs with a tkinter feather icon.
-try:
-    if hasattr(sys, '_MEIPASS'):
-        path = sys._MEIPASS  # pylint: disable=C0103
-    else:
-        path = os.path.abspath(".")  # pylint: disable=C0103
-        app.iconbitmap(os.path.join(path, 'icon.ico'))
-finally:
-    app.mainloop()
+class PlotFrame(PlotMethods, SimpleFrame):
+    '''Frame to hold a canvas with matplotlib plots.'''
+    def __init__(self, parent, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.root = parent.root
+        self.make_figure()
+        self.canvas = FigureCanvasTkAgg(self.plot_figure, self)
+        self.canvas.draw()
+        self.canvas.get_tk_widget().pack(
+            side="top", fill="both", expand=True,
+            )
+        self.canvas.mpl_connect('button_press_event', self.onclick)
+        self.canvas.mpl_connect('resize_event', self.onresize)
+
+
+class AttractorWindow(tk.Toplevel):  # pylint: disable=R0902
+    '''A separate window that plays the chaos game with matrices from the
+    catalog.  Each matrix gets a row where it can be switched on and given a
+    translation and a probability, and the resulting point density is shown
+    with a logarithmic color scale.
+    '''
+    # the most points a single render will use, which takes a few seconds
+    max_points = 10 ** 8
+    # how many points are counted between chances for tkinter to handle
+    # other events while a render is running
+    chunk_size = 2 ** 20
+
+    def __init__(self, root):
+        super().__init__(root)
+        super().title("pymap attractor")
+        self.root = root
+        self.controls = SimpleFrame(
+            self, side="left", fill="y", expand=False, root=root
+            )
+        self.label = tk.Label(
+            self.controls, text="Maps: use, x, y, probability",
+            font=(root.font_name, root.font_size[2])
+            )
+        self.label.pack(side="top")
+        names = root.data.list_matrices()
+        self.rows = [
+            MapRow(self.controls, name, index / len(names), side="top",
+                   fill="x", expand=False)
+            for index, name in enumerate(names)
+            ]
+        spacer(self.controls, 10, 1, "top")
+        self.count_label = tk.Label(
+            self.controls, text="Number of points",
+            font=(root.font_name, root.font_size[1])
+            )
+        self.count_label.pack(side="top")
+        self.count = tk.DoubleVar(self, 1e7)
+        self.count_entry = tk.Entry(
+            self.controls, textvariable=self.count, width=13,
+            font=(root.font_name, root.font_size[0])
+            )
+        self.count_entry.pack(side="top")
+        self.render_button = tk.Button(
+            self.controls, text="Render", command=self.render, height=1,
+            font=(root.font_name, root.font_size[0])
+            )
+        self.render_button.pack(side="top")
+        self.stop_button = tk.Button(
+            self.controls, text="Stop", command=self.stop, height=1,
+            font=(root.font_name, root.font_size[0])
+            )
+        self.stop_button.pack(side="top")
+        # job is the density_chunks() generator of the render in progress,
+        # job_count the number of points it will count, start the time it
+        # began, and pending its next scheduled chunk
+        self.job = None
+        self.job_count = 0
+        self.start = 0
+        self.pending = None
+        self.plot_figure = Figure(figsize=(5, 5), dpi=100)
+        self.plot_axis = self.plot_figure.add_subplot(111)
+        self.plot_axis.set_aspect('equal', 'box')
+        self.canvas = FigureCanvasTkAgg(self.plot_figure, self)
+        self.canvas.draw()
+        self.canvas.get_tk_widget().pack(
+            side="left", fill="both", expand=True,
+            )
+
+    def render(self):
+        '''Starts playing the chaos game with the maps that are switched on,
+        replacing any render in progress.  Rows with non-numeric entries are
+        left out, and more than max_points points are cut back to max_points.
+        The points are counted a chunk at a time between other tkinter
+        events, with the progress shown in the window title.
+        '''
+        self.stop()
+        matrices, translations, probabilities = [], [], []
+        for row in self.rows:
+            if not row.use.get():
+                continue
+            try:
+                translation = (row.ent[0].get(), row.ent[1].get())
+                probability = row.ent[2].get()
+            except tk.TclError:
+                continue
+            matrices.append(self.root.data.matrix_dict[row.name])
+            translations.append(translation)
+            probabilities.append(max(probability, 0))
+        try:
+            requested = self.count.get()
+        except tk.TclError:
+            requested = 0
+        if np.isnan(requested):
+            requested = 0
+        if requested > self.max_points:
+            requested = self.max_points
+            self.count.set(requested)
+        count = int(requested)
+        if not matrices or count <= 0:
+            self.plot_axis.clear()
+            self.canvas.draw()
+            return
+        self.start = time.perf_counter()
+        self.job_count = count
+        self.job = Attractor(
+            matrices, translations, probabilities
+            ).density_chunks(count, chunk_size=self.chunk_size)
+        self.pending = self.after(1, self.render_step)
+
+    def render_step(self):
+        '''Counts one chunk of points, then either schedules the next chunk
+        or shows the finished picture.
+        '''
+        (density, extent, done) = next(self.job)
+        if done < self.job_count:
+            super().title("pymap attractor: {:.0%}".format(
+                done / self.job_count
+                ))
+            self.pending = self.after(1, self.render_step)
+            return
+        seconds = time.perf_counter() - self.start
+        self.stop()
+        ax = self.plot_axis  # pylint: disable=C0103
+        ax.clear()
+        ax.imshow(
+            density, origin='lower', extent=extent, cmap='magma',
+            interpolation='nearest',
+            norm=LogNorm(vmin=1, vmax=max(density.max(), 10))
+            )
+        ax.set_title(
+            "{:,} points in {:.2f} s".format(done, seconds),
+            fontsize=self.root.font_size[1], loc='right'
+            )
+        self.canvas.draw()
+
+    def stop(self):
+        '''Abandons the render in progress, if there is one.'''
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+        self.job = None
+        self.pending = None
+        super().title("pymap attractor")
+
+    def destroy(self):
+        '''Stops any render before the window closes.'''
+        self.stop()
+        super().destroy()
+
+
+class MapRow(SimpleFrame):
+    '''One map of an attractor: a check box to use the named matrix, and
+    entries for its translation and probability.  Matrices that do not
+    stretch anything are switched on to begin with, and the translations
+    start out spread around the unit circle.
+    '''
+    def __init__(self, parent, name, turn, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.root = parent.root
+        self.name = name
+        matrix = self.root.data.matrix_dict[name]
+        self.use = tk.BooleanVar(
+            self, bool(np.linalg.norm(matrix.array, 2) <= 1 + 1e-9)
+            )
+        self.check = tk.Checkbutton(
+            self, text=name, variable=self.use, width=16, anchor="w",
+            font=(self.root.font_name, self.root.font_size[0])
+            )
+        self.check.pack(side="left", fill="none", expand=False)
+        angle = 2 * np.pi * turn
+        self.ent = [tk.DoubleVar(self, round(np.cos(angle), 3)),
+                    tk.DoubleVar(self, round(np.sin(angle), 3)),
+                    tk.DoubleVar(self, 1)]
+        self.col = [""] * 3
+        for index in range(3):
+            self.col[index] = tk.Entry(
+                self, textvariable=self.ent[index], width=6
+                )
+            self.col[index].pack(side="left", fill="none", expand=True)
+
+#########################################################################
+#                                                                       #
+#                              Replay code                              #
+# This part of the code replays recorded sessions without a display, so #
+# that the time each user action takes can be measured and compared     #
+# between versions of the program.  Only a Tcl interpreter is started;  #
+# the frames are replaced by plain objects holding the same tkinter     #
+# variables, and the plot is drawn on an offscreen Agg canvas.          #
+#                                                                       #
+#########################################################################
+
+
+def _ignore(*_, **__):
+    '''Stands in for widget methods that only change what is on screen.'''
+
+
+class HeadlessApp(PyMapApp):
+    '''A PyMapApp without any windows, for replaying recorded sessions.'''
+    def __init__(self):  # pylint: disable=W0231
+        tk.Tk.__init__(self, useTk=False)
+        self.data = AppData(base_point=self.default_base_point)
+        self.control_frame = HeadlessControls(self)
+        self.plot_frame = HeadlessPlot(self)
+
+
+class HeadlessControls(ControlMethods):
+    '''The ControlFrame methods, with the frames they use replaced by
+    objects holding the same tkinter variables.
+    '''
+    def __init__(self, root):
+        self.root = root
+
+        def entry():
+            return SimpleNamespace(
+                ent=[tk.DoubleVar(root), tk.DoubleVar(root)]
+                )
+
+        self.base_point_frame = SimpleNamespace(entry=entry())
+        self.matrix_frame = SimpleNamespace(
+            row=[entry(), entry()], choice=tk.StringVar(root),
+            choices=root.data.list_matrices(),
+            save_frame=SimpleNamespace(matrix_name=tk.StringVar(root)),
+            menu_frame=SimpleNamespace(reload=_ignore),
+            change_matrix=self.change_matrix
+            )
+        self.selection_frame = SimpleNamespace(show=_ignore)
+        self.watch_entries()
+
+    def after(self, delay, func):
+        '''Schedules func with the Tcl interpreter, like a widget would.'''
+        return self.root.after(delay, func)
+
+    def after_cancel(self, pending):
+        '''Cancels a call scheduled by after().'''
+        self.root.after_cancel(pending)
+
+
+class HeadlessPlot(PlotMethods):
+    '''The PlotFrame methods, drawing on an offscreen Agg canvas.'''
+    def __init__(self, root):
+        self.root = root
+        self.make_figure()
+        self.canvas = FigureCanvasAgg(self.plot_figure)
+        self.canvas.draw()
+
+
+def replay_session(path):
+    '''Replays the actions recorded in a file by a Recorder against a
+    HeadlessApp, using the .ini files in the working directory.  Returns a
+    dict mapping each action name to a list of how long, in seconds, each
+    of its replays took.  Entry edits run their live update right away, so
+    every recorded keystroke is timed, including the ones that a live
+    session would have coalesced.  Recorded figure sizes are applied to the
+    offscreen figure but not timed, so that clicks pick the same things they
+    did when they were recorded.
+    '''
+    app = HeadlessApp()
+    controls = app.control_frame
+    controls.refresh_entries()
+    with open(path, "r") as session_file:
+        actions = [json.loads(line) for line in session_file
+                   if line.strip() != ""]
+    latencies = dict()
+    for line in actions:
+        (action, args) = (line["action"], line["args"])
+        if action == "canvas":
+            app.plot_frame.resize(*args)
+            continue
+        start = time.perf_counter()
+        if action == "entry":
+            (field, index, value) = args
+            controls.entry_variable(field, index).set(value)
+            controls.flush_live_update()
+        elif action == "click":
+            (xdata, ydata, button) = args
+            app.plot_frame.onclick(
+                SimpleNamespace(xdata=xdata, ydata=ydata, button=button)
+                )
+        elif action == "save_matrix":
+            controls.matrix_frame.save_frame.matrix_name.set(*args)
+            controls.save_matrix()
+        else:
+            getattr(controls, action)(*args)
+        latencies.setdefault(action, []).append(
+            time.perf_counter() - start
+            )
+    return latencies
+
+
+def _format_latencies(latencies):
+    '''Lays out the results of replay_session() as a table of latency
+    percentiles, in milliseconds, for each action and for all of them.
+    '''
+    every = [value for values in latencies.values() for value in values]
+    rows = sorted(latencies.items()) + [("all", every)]
+    lines = ["{:<16}{:>7}{:>10}{:>10}{:>10}{:>10}".format(
+        "action", "count", "p50", "p90", "p99", "max"
+        )]
+    for (action, values) in rows:
+        if not values:
+            continue
+        milliseconds = 1000 * np.array(values)
+        lines.append("{:<16}{:>7}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}".format(
+            action, len(values), *np.percentile(milliseconds, [50, 90, 99]),
+            milliseconds.max()
+            ))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(  # pylint: disable=C0103
+        description="Show the effect of a matrix on a polygon."
+        )
+    parser.add_argument(
+        "--record", metavar="FILE",
+        help="write every user action in this session to FILE"
+        )
+    parser.add_argument(
+        "--replay", metavar="FILE",
+        help="replay the actions in FILE without a display and print how "
+        "long each kind of action took"
+        )
+    options = parser.parse_args()  # pylint: disable=C0103
+    if options.replay is not None:
+        print(_format_latencies(replay_session(options.replay)))
+        sys.exit()
+    app = PyMapApp()  # pylint: disable=C0103
+    if options.record is not None:
+        app.recorder = Recorder(options.record)
+        app.plot_frame.record_canvas()
+    app.control_frame.refresh_entries()
+    # This detects if the program is running from a file instead of an
+    # interpreter and loads the app icon appropriately.  If it can't load an
+    # icon, the exception is ignored and the program runs with a tkinter
+    # feather icon.
+    try:
+        if hasattr(sys, '_MEIPASS'):
+            path = sys._MEIPASS  # pylint: disable=C0103
+        else:
+            path = os.path.abspath(".")  # pylint: disable=C0103
+            app.iconbitmap(os.path.join(path, 'icon.ico'))
+    finally:
+        app.mainloop()
+        if app.recorder is not None:
+            app.recorder.close()
@@ -0,0 +1,192 @@
+'''Checks of the pymap back end that run without a display.'''
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pymap import (Attractor, BasePoint, HeadlessApp, HitIndex, Matrix,
+                   Polygon, Recorder, Scene, replay_session)
+
+# the closing edge, from (3, 2) back to (3, 0), is the one a ray cast to
+# the right of (2, 1) crosses
+TRIANGLE = np.array([[3., 0., 3.], [0., 1., 2.]])
+
+HALF = Matrix("half", [0.5, 0], [0, 0.5])
+# the chaos game for these maps fills in a Sierpinski triangle inside the
+# unit square
+SIERPINSKI = Attractor([HALF] * 3, [(0, 0), (0.5, 0), (0.25, 0.5)],
+                       [1, 1, 1])
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    '''A HeadlessApp using the default .ini files.'''
+    monkeypatch.chdir(tmp_path)
+    headless = HeadlessApp()
+    headless.control_frame.refresh_entries()
+    return headless
+
+
+def test_open_outline_closes_before_nan_separator():
+    '''The last vertex of an outline ending in a NaN column pairs with the
+    first vertex of the outline, not with the NaN column.
+    '''
+    separated = np.concatenate((TRIANGLE, [[np.nan], [np.nan]]), axis=1)
+    assert list(HitIndex([TRIANGLE]).containing_layers(2, 1)) == [0]
+    assert list(HitIndex([separated]).containing_layers(2, 1)) == [0]
+
+
+def test_nearest_vertex_prefers_layer_drawn_last():
+    '''Vertices shared by two layers are picked from the top one.'''
+    index = HitIndex([TRIANGLE, TRIANGLE])
+    assert index.nearest_vertex(0.01, 1, 0.1) == (1, 1)
+    assert index.nearest_vertex(5, 5, 0.1) is None
+
+
+def test_overlapping_outlines_in_one_layer_do_not_cancel():
+    '''A point inside two overlapping polygons of a scene is inside the
+    scene, and is reported on the outline of the polygon drawn last.
+    '''
+    square = Polygon("square", [0, 1, 1, 0, 0], [0, 0, 1, 1, 0])
+    scene = Scene()
+    scene.add(square, BasePoint(0, 0))
+    scene.add(square, BasePoint(0.5, 0.5))
+    index = HitIndex([scene.vertices])
+    assert list(index.containing_layers(0.75, 0.75)) == [0]
+    assert index.pick(0.75, 0.75, 0.01) == (0, None, 6)
+    assert index.pick(0.25, 0.25, 0.01) == (0, None, 0)
+    assert index.pick(1.5, 1.51, 0.05) == (0, 8, 8)
+
+
+def test_refresh_entries_does_not_schedule_live_update(app):
+    '''Writes made by the app itself are not treated as typing.'''
+    controls = app.control_frame
+    assert controls.pending is None
+    controls.change_matrix(app.data.list_matrices()[1])
+    assert controls.pending is None
+
+
+def test_partial_entry_leaves_matrix_alone(app):
+    '''An entry that is not yet a number skips the live update.'''
+    controls = app.control_frame
+    matrix = app.data.matrix
+    controls.entry_variable(1, 0).set("-")
+    controls.flush_live_update()
+    assert app.data.matrix is matrix
+    assert controls.pending is None
+
+
+def test_burst_of_edits_schedules_one_live_update(app):
+    '''Edits made while an update is waiting join that update.'''
+    controls = app.control_frame
+    controls.entry_variable(1, 0).set("2")
+    pending = controls.pending
+    assert pending is not None
+    controls.entry_variable(1, 0).set("2.5")
+    assert controls.pending == pending
+    controls.flush_live_update()
+    assert controls.pending is None
+    assert app.data.matrix.array[0, 0] == 2.5
+
+
+def test_scene_selection_skips_empty_polygons(app):
+    '''Shapes are numbered by their place in the scene even when an empty
+    polygon, which has no outline, comes before them.
+    '''
+    shown = []
+    app.control_frame.selection_frame.show = \
+        lambda *args, **kwargs: shown.append((args, kwargs))
+    app.data.scene.add(Polygon("empty", [], []), BasePoint(0, 0))
+    square = Polygon("square", [0, 1, 1, 0, 0], [0, 0, 1, 1, 0])
+    app.data.scene.add(square, BasePoint(2, 2))
+    app.data.make_transformed_polygon()
+    app.plot_frame.replot()
+    plot = app.plot_frame
+    hit = plot.pick(3, 3)
+    assert plot.layer_info[hit[0]] == (0, True)
+    plot.select(*hit, 3, 3)
+    assert shown[-1] == ((0, 2, 3.0, 3.0), {"shape": 1})
+    plot.select(*plot.pick(2.5, 2.5), 2.5, 2.5)
+    assert shown[-1] == ((0, None, 2.5, 2.5), {"shape": 1})
+
+
+@pytest.mark.parametrize("count, walkers, chunk_size", [
+    (12345, 1000, 4096), (1000, 64, 64), (7, 16, 1), (0, 16, 16)
+    ])
+def test_density_counts_every_point_exactly(count, walkers, chunk_size):
+    '''Every requested point lands in a histogram whose extent covers the
+    attractor, whether or not count fits evenly into walkers and chunks.
+    '''
+    (histogram, extent) = SIERPINSKI.density(
+        count, bins=32, extent=(-0.1, 1.1, -0.1, 1.1), walkers=walkers,
+        chunk_size=chunk_size, seed=0
+        )
+    assert histogram.shape == (32, 32)
+    assert histogram.sum() == count
+    assert extent == (-0.1, 1.1, -0.1, 1.1)
+
+
+def test_density_chunks_report_progress():
+    '''Each chunk reports how many points have been counted so far.'''
+    done = [done for (_, _, done) in SIERPINSKI.density_chunks(
+        1000, bins=8, walkers=100, chunk_size=300, seed=0
+        )]
+    assert done == [300, 600, 900, 1000]
+
+
+def test_density_never_uses_map_with_zero_probability():
+    '''A map with probability 0 would send points far outside the
+    extent, so none may be lost.
+    '''
+    attractor = Attractor([HALF, HALF], [(0, 0), (10, 10)], [1, 0])
+    (histogram, _) = attractor.density(
+        5000, bins=16, extent=(-1, 1, -1, 1), walkers=100, seed=0
+        )
+    assert histogram.sum() == 5000
+
+
+def test_density_is_repeatable_with_seed():
+    '''The same seed gives the same picture.'''
+    (first, first_extent) = SIERPINSKI.density(10000, bins=16, seed=3)
+    (second, second_extent) = SIERPINSKI.density(10000, bins=16, seed=3)
+    assert np.array_equal(first, second)
+    assert first_extent == second_extent
+
+
+def test_resize_applies_aspect_before_next_pick(app):
+    '''A figure resized for a replay converts the pick radius with its new
+    axes box, not the one from the previous draw.
+    '''
+    plot = app.plot_frame
+    plot.resize(10, 5, 100)
+    radius = plot.data_radius()
+    plot.canvas.draw()
+    assert radius == pytest.approx(plot.data_radius())
+
+
+def test_recorded_session_replays_every_action(app, tmp_path):
+    '''Each recorded action is timed once on replay, and the figure size
+    header is applied rather than timed.
+    '''
+    path = tmp_path / "session.jsonl"
+    app.recorder = Recorder(path)
+    controls = app.control_frame
+    app.plot_frame.record_canvas()
+    controls.change_polygon(app.data.list_polygons()[1])
+    controls.change_matrix(app.data.list_matrices()[1])
+    controls.entry_variable(1, 0).set("2")
+    controls.entry_variable(1, 0).set("2.5")
+    controls.flush_live_update()
+    controls.add_to_scene()
+    for (xdata, ydata) in ((0.5, 0.5), (None, None)):
+        app.plot_frame.onclick(
+            SimpleNamespace(xdata=xdata, ydata=ydata, button=1)
+            )
+    controls.clear_scene()
+    app.recorder.close()
+    latencies = replay_session(path)
+    assert {action: len(times) for (action, times) in latencies.items()} \
+        == {"change_polygon": 1, "change_matrix": 1, "entry": 2,
+            "add_to_scene": 1, "click": 2, "clear_scene": 1}
+    assert all(seconds >= 0 for times in latencies.values()
+               for seconds in times)